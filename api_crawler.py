@@ -1,9 +1,11 @@
 from txrequests import Session
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple
 from http.cookiejar import CookieJar
 from threading import Lock
 from lxml import html
 from string import Template
+from crawl_queue import CrawlPriorityPolicy
+from connections import ConnectionManager
 import requests
 import json
 import logging
@@ -30,6 +32,8 @@ class Website:
             self.default_data = dict()
         self.lock = Lock()
         self.sleep_time = 1  # the incrementing time to pause requests to this website after a bad response code
+        self.version = 0  # incremented whenever the queried time ranges change
+        self.persisted_version = 0  # the version of the queried time ranges in the last stored checkpoint
 
     def update_queried_timestamps(self, newly_queried_timerange: datetimerange.DateTimeRange):
         """
@@ -37,24 +41,44 @@ class Website:
         :param newly_queried_timerange: the time range of the just queried articles
         """
         with self.lock:  # synchronize because this methods gets called from a background thread
-            self.queried_timeranges.append(newly_queried_timerange)
-            # we do not need to union time ranges if the lists size is smaller than 1
-            if len(self.queried_timeranges) <= 1:
-                return
-            self.queried_timeranges.sort(key=lambda x: x.start_datetime)
-            current_timerange_index = 0
-            # unite time ranges inplace
-            while current_timerange_index < len(self.queried_timeranges) - 1:
-                time_range = self.queried_timeranges[current_timerange_index + 1]
-                if time_range.is_intersection(self.queried_timeranges[current_timerange_index]):
-                    # if the two time ranges intersect, build the union and remove old time ranges from the list
-                    current_time_range = self.queried_timeranges.pop(current_timerange_index)
-                    self.queried_timeranges.pop(current_timerange_index)
-                    union_range = current_time_range.encompass(time_range)
-                    # insert the union back into the list
-                    self.queried_timeranges.insert(current_timerange_index, union_range)
-                else:
-                    current_timerange_index += 1
+            previous_timeranges = list(self.queried_timeranges)
+            self.unite_queried_timestamps(newly_queried_timerange)
+            if self.queried_timeranges != previous_timeranges:
+                self.version += 1
+
+    def unite_queried_timestamps(self, newly_queried_timerange: datetimerange.DateTimeRange):
+        self.queried_timeranges.append(newly_queried_timerange)
+        # we do not need to union time ranges if the lists size is smaller than 1
+        if len(self.queried_timeranges) <= 1:
+            return
+        self.queried_timeranges.sort(key=lambda x: x.start_datetime)
+        current_timerange_index = 0
+        # unite time ranges inplace
+        while current_timerange_index < len(self.queried_timeranges) - 1:
+            time_range = self.queried_timeranges[current_timerange_index + 1]
+            if time_range.is_intersection(self.queried_timeranges[current_timerange_index]):
+                # if the two time ranges intersect, build the union and remove old time ranges from the list
+                current_time_range = self.queried_timeranges.pop(current_timerange_index)
+                self.queried_timeranges.pop(current_timerange_index)
+                union_range = current_time_range.encompass(time_range)
+                # insert the union back into the list
+                self.queried_timeranges.insert(current_timerange_index, union_range)
+            else:
+                current_timerange_index += 1
+
+    def is_dirty(self) -> bool:
+        return self.version != self.persisted_version
+
+    def get_snapshot(self) -> Tuple[int, list]:
+        """
+        Returns a consistent copy of the queried time ranges together with their version.
+        """
+        with self.lock:
+            return self.version, list(self.queried_timeranges)
+
+    def mark_persisted(self, version: int):
+        with self.lock:
+            self.persisted_version = max(self.persisted_version, version)
 
     def get_surrounding_timerange(self, time: datetime.datetime) -> Optional[datetimerange.DateTimeRange]:
         timerange: datetimerange.DateTimeRange
@@ -68,8 +92,12 @@ class Website:
 
 
 class Crawler:
-    def __init__(self, max_concurrent_requests):
+    def __init__(self, max_concurrent_requests, connections: Optional[ConnectionManager] = None):
+        self.connections = connections
+        if connections is None:
+            self.connections = ConnectionManager()
         self.session = Session(maxthreads=max_concurrent_requests)
+        self.connections.configure_session(self.session)  # share connection pools and cookies with other crawlers
 
     def add_website_request(self, website: Website, callback: Callable[[Session, requests.Response], requests.Response],
                             query_params: dict, data: dict):
@@ -85,12 +113,14 @@ class Crawler:
         self.session.cookies.update(cookies)
 
     def stop(self):
+        self.connections.release_session(self.session)  # the shared pools are closed by the connection manager
         self.session.close()
 
 
 class EuroNewsCrawler(Crawler):
-    def __init__(self, database, max_database_size: int, max_requests, working_dir):
-        super().__init__(max_requests)
+    def __init__(self, database, max_database_size: int, max_requests, working_dir,
+                 connections: Optional[ConnectionManager] = None):
+        super().__init__(max_requests, connections)
         self.response_handlers = []
         assert os.path.isdir(working_dir), "path is not a directory"
         assert os.access(working_dir, os.W_OK), "directory not writeable"
@@ -112,16 +142,14 @@ class EuroNewsCrawler(Crawler):
             Website("euronews.com", language="arabic", default_query_params={"limit": 50}), #check
         ]
         self.db = database
+        self.policy: CrawlPriorityPolicy = database.queue.policy
         self.load_progress()
 
     def start(self, start_crawling_dates=None):
         if start_crawling_dates is None:
             start_crawling_dates = []
         logging.info("Starting crawler for librivox api for new articles...")
-        article_count = self.db.get_not_downloaded_article_count()
-        if article_count >= self.max_database_size:
-            logging.info(f"No fetching of new articles because the database is still big enough")
-            return
+        # new articles are always fetched, the database size only limits crawling older articles for the backfill
         for website in self.websites:
             for start_date in start_crawling_dates:
                 website.update_queried_timestamps(datetimerange.DateTimeRange(start_date, start_date))
@@ -132,9 +160,10 @@ class EuroNewsCrawler(Crawler):
         self.response_handlers.append(handler)
 
     def persist_progress(self):
+        if not any(website.is_dirty() for website in self.websites):
+            return
         logging.debug("Persisting progress of websites..")
-        for website in self.websites:
-            self.db.store_website(website)
+        self.db.store_progress(self.websites)
 
     def load_progress(self):
         for website in self.websites:
@@ -201,10 +230,11 @@ class EuroNewsCrawler(Crawler):
                     min_time = last_updated
             website.update_queried_timestamps(datetimerange.DateTimeRange(min_time, max_time))
             surrounding_timerange = website.get_surrounding_timerange(min_time)
-            article_count = self.db.get_not_downloaded_article_count()
+            backfill_count = self.db.get_not_downloaded_article_count(CrawlPriorityPolicy.backfill_lane)
             if surrounding_timerange is not None:
-                if article_count < self.max_database_size:
-                    self.continue_website_crawling_after_time(website, surrounding_timerange.start_datetime)
+                next_time = surrounding_timerange.start_datetime
+                if self.policy.is_live(next_time) or backfill_count < self.max_database_size:
+                    self.continue_website_crawling_after_time(website, next_time)
                 else:
                     logging.debug(f"Stop crawling api {website.api_url} for now because database size limit reached")
             else:
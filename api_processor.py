@@ -1,5 +1,8 @@
 from api_crawler import Website
 from db import Database
+from video_predictor import VideoPredictor
+from manifest import Manifest
+from typing import Optional
 import os
 import json
 import logging
@@ -8,11 +11,14 @@ from concurrent import futures
 
 
 class ApiProcessor:
-    def __init__(self, database: Database, working_dir_path: str):
+    def __init__(self, database: Database, working_dir_path: str, predictor: Optional[VideoPredictor] = None,
+                 manifest: Optional[Manifest] = None):
         assert os.path.isdir(working_dir_path), "path is not a directory"
         assert os.access(working_dir_path, os.W_OK), "directory not writeable"
         self.working_dir = working_dir_path
         self.db = database
+        self.predictor = predictor
+        self.manifest = manifest
 
     def enqueue_response(self, website: Website, response: dict):
         with futures.ThreadPoolExecutor(max_workers=2) as executor:
@@ -25,11 +31,23 @@ class ApiProcessor:
             storage_dir = self.get_persistent_file_path_for_response(website, response)
             os.makedirs(storage_dir, exist_ok=True)
             assert os.access(storage_dir, os.W_OK), f"directory not writeable: {storage_dir}"
-            self.db.store_article(response["id"], website.language, full_page_path,
-                                  storage_dir)  # store information for the page crawler in db
+            # the newest articles are fetched again every hour, only new articles are predicted and stored
+            known = self.db.is_known_article(response["id"], website.language)
+            if not known:
+                prediction, crawl = None, True
+                if self.predictor is not None:
+                    prediction, crawl = self.predictor.predict(website.language, response)
+                if crawl:  # store information for the page crawler in db
+                    self.db.store_article(response["id"], website.language, full_page_path, storage_dir,
+                                          response.get("publishedAt"), prediction)
+                else:
+                    self.db.store_skipped_article(response["id"], website.language, full_page_path, storage_dir,
+                                                  response.get("publishedAt"), prediction)
             response_file = os.path.join(storage_dir, "meta.json")
             with open(response_file, "w+") as f:
                 f.write(json.dumps(response, indent=4))
+            if self.manifest is not None and not known:
+                self.manifest.update_meta(response["id"], website.language, response, storage_dir)
         except Exception as e:
             logging.error(f"[{website.language}] exception while handling {response}")
             logging.exception(e)
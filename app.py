@@ -2,6 +2,9 @@ from api_crawler import EuroNewsCrawler
 from api_processor import ApiProcessor
 from page_crawler import PageCrawler
 from db import Database
+from video_predictor import VideoPredictor
+from manifest import Manifest
+from connections import ConnectionManager
 import logging
 import schedule
 import time
@@ -27,22 +30,34 @@ if __name__ == '__main__':
     db = Database(working_dir)
     db.reset_crawled_articles_status()  # restart downloads from previous session
 
+    # ConnectionManager is responsible for sharing connections and cookies between all outgoing requests
+    connections = ConnectionManager()
+
     # EuroNewsCrawler is responsible for delivering article metadata to the ApiProcessor
-    crawler = EuroNewsCrawler(db, 1000, 1, working_dir)
+    crawler = EuroNewsCrawler(db, 1000, 1, working_dir, connections)
     start_dates = None  # [datetime.datetime(year=2020, month=1, day=1), datetime.datetime(year=2019, month=1, day=1)]
     crawler.start(start_dates)
 
     # ApiProcessor is responsible for filtering article metadata and create directories to store audio/text
-    processor = ApiProcessor(db, working_dir)
+    # VideoPredictor is responsible for estimating from article metadata whether an article contains a video
+    # articles of editions where less than 2% of the crawled pages have a video are crawled last, 10% of them are still
+    # crawled normally to measure misses; hard skipping stays disabled until rules for the api metadata exist
+    predictor = VideoPredictor(db, skip_threshold=0.02, exploration_rate=0.1)
+    # Manifest is responsible for indexing the collected articles so the corpus can be exported without scanning it
+    manifest = Manifest(working_dir)
+    processor = ApiProcessor(db, working_dir, predictor, manifest)
     crawler.register_response_handler(processor.enqueue_response)
 
     # PageCrawler is responsible for actually crawling a single article and download text and audio
-    page_crawler = PageCrawler(db, 1)
+    page_crawler = PageCrawler(db, 1, predictor=predictor, manifest=manifest, connections=connections)
 
     schedule.every(1).hours.do(crawler.start)  # schedule for loading new articles in the api
     schedule.every(10).seconds.do(crawler.persist_progress)  # schedule for persisting crawling progress
     schedule.every(30).seconds.do(page_crawler.crawl_next_pages)  # schedule for crawling articles and their videos
     schedule.every(1).minutes.do(lambda: log_downloaded_articles(db))  # schedule for crawling articles and their videos
+    schedule.every(10).minutes.do(predictor.log_metrics)  # schedule for logging the savings of the video prediction
+    schedule.every(10).minutes.do(predictor.requeue_skipped_articles)  # schedule for requeuing skipped articles
+    schedule.every(10).minutes.do(connections.log_statistics)  # schedule for logging the reuse of connections
 
     try:
         while True:
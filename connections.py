@@ -0,0 +1,111 @@
+from typing import Optional
+from http.cookiejar import MozillaCookieJar
+from threading import Lock
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+import youtube_dl
+import requests
+import logging
+import json
+import os
+
+
+class ConnectionManager:
+    """
+    Shares connections between all outgoing requests. Every session configured by this manager uses the same
+    keep-alive connection pools per host and the same cookie jar, and youtube-dl instances are reused between videos
+    instead of being created (and reloading their cookies) for every download.
+    """
+
+    def __init__(self, cookie_file: Optional[str] = "./cookies.txt", pool_connections: int = 16, pool_maxsize: int = 8):
+        """
+        :param cookie_file: a cookie file in the mozilla format which is loaded into the shared cookie jar
+        :param pool_connections: the number of hosts to keep a connection pool for
+        :param pool_maxsize: the maximum number of connections kept alive per host
+        """
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.cookies = RequestsCookieJar()
+        if cookie_file is not None and os.path.isfile(cookie_file):
+            cookie_jar = MozillaCookieJar(cookie_file)
+            cookie_jar.load(ignore_discard=True, ignore_expires=True)
+            self.cookies.update(cookie_jar)
+        self.session = self.configure_session(requests.Session())
+        self.lock = Lock()
+        self.youtube_downloaders = {}  # maps the key of the properties to a tuple of (YoutubeDL, Lock)
+        self.youtube_downloads = 0
+
+    def configure_session(self, session: requests.Session) -> requests.Session:
+        """
+        Lets the given session use the shared connection pools and cookie jar.
+        """
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        session.cookies = self.cookies
+        return session
+
+    def release_session(self, session: requests.Session):
+        """
+        Detaches a session from the shared connection pools, so closing the session does not close the pools which
+        are still used by other sessions.
+        """
+        session.mount("http://", HTTPAdapter())
+        session.mount("https://", HTTPAdapter())
+
+    def close(self):
+        """
+        Closes the shared connection pools, must only be called after all sessions stopped using them.
+        """
+        self.session.close()
+        self.adapter.close()
+
+    def get_session(self) -> requests.Session:
+        return self.session
+
+    def youtube_download(self, url: str, properties: dict, output_template: str) -> dict:
+        """
+        Downloads a video with a YoutubeDL instance which is reused for all downloads with equal properties.
+        :param url: the url of the video
+        :param properties: the properties of the YoutubeDL instance, e.g. the subtitle languages and rate limit
+        :param output_template: the output template of this download
+        :return: the info of the downloaded video
+        """
+        key = self.get_properties_key(properties)
+        with self.lock:
+            if key not in self.youtube_downloaders:
+                self.youtube_downloaders[key] = (youtube_dl.YoutubeDL(properties), Lock())
+            tube, tube_lock = self.youtube_downloaders[key]
+            self.youtube_downloads += 1
+        with tube_lock:  # the output template is part of the shared params, so downloads must not overlap
+            tube.params["outtmpl"] = output_template
+            return tube.extract_info(url)
+
+    @staticmethod
+    def get_properties_key(properties: dict) -> str:
+        properties = {name: value for name, value in properties.items() if name != "outtmpl"}
+        # objects like the logger are identified by their instance because they cannot be serialized
+        return json.dumps(properties, sort_keys=True, default=lambda value: f"{type(value).__name__}@{id(value)}")
+
+    def get_statistics(self) -> dict:
+        requests_count = 0
+        connections_count = 0
+        pools = self.adapter.poolmanager.pools
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            requests_count += pool.num_requests
+            connections_count += pool.num_connections
+        reuse_rate = 1 - connections_count / requests_count if requests_count > 0 else 0
+        return {
+            "requests": requests_count,
+            "connections": connections_count,
+            "reuse_rate": reuse_rate,
+            "youtube_downloads": self.youtube_downloads,
+            "youtube_instances": len(self.youtube_downloaders),
+        }
+
+    def log_statistics(self):
+        statistics = self.get_statistics()
+        logging.info(f"Connections: {statistics['connections']} opened for {statistics['requests']} requests "
+                     f"({statistics['reuse_rate']:.1%} reused), {statistics['youtube_instances']} youtube-dl "
+                     f"instances for {statistics['youtube_downloads']} downloads")
@@ -0,0 +1,151 @@
+from typing import Optional, Tuple
+import datetime
+import heapq
+import itertools
+import math
+
+
+class CrawlPriorityPolicy:
+    live_lane = "live"
+    backfill_lane = "backfill"
+
+    def __init__(self, live_window: datetime.timedelta = datetime.timedelta(hours=6),
+                 recency_half_life: datetime.timedelta = datetime.timedelta(days=30),
+                 language_weights: dict = None, video_weight: float = 1.0,
+                 deprioritized_delay: datetime.timedelta = datetime.timedelta(days=36500)):
+        self.live_window = live_window  # articles published within this window are crawled in the live lane
+        # an article with twice the weight is crawled like an article published one half life later
+        self.recency_half_life = recency_half_life
+        self.language_weights = language_weights  # positive weights per language, defaults to 1
+        if language_weights is None:
+            self.language_weights = dict()
+        self.video_weight = video_weight  # how strongly the probability of a video raises the priority
+        # deprioritized articles are crawled like articles published this long before them, i.e. after all others
+        self.deprioritized_delay = deprioritized_delay
+
+    def get_lane(self, published_at: Optional[int], now: datetime.datetime = None) -> str:
+        """
+        Returns the lane an article is crawled in based on its publishing time.
+        :param published_at: the 'publishedAt' unix timestamp of the article or None if unknown
+        :param now: the time to compare against, defaults to the current time
+        """
+        if published_at is None:
+            return self.backfill_lane
+        if now is None:
+            now = datetime.datetime.utcnow()
+        age = now - datetime.datetime.utcfromtimestamp(published_at)
+        return self.live_lane if age <= self.live_window else self.backfill_lane
+
+    def is_live(self, time: datetime.datetime, now: datetime.datetime = None) -> bool:
+        if now is None:
+            now = datetime.datetime.utcnow()
+        return now - time <= self.live_window
+
+    def get_priority(self, language: str, published_at: Optional[int], video_likelihood: float = 0.5,
+                     deprioritized: bool = False) -> float:
+        """
+        Calculates the priority of an article, higher values get crawled first. The priority is the publishing time
+        shifted by one recency half life for every doubling of the language and video weight. This orders articles
+        like a recency score which halves every half life, but does not change over time, so queued articles never
+        have to be rescored.
+        :param language: the language of the article
+        :param published_at: the 'publishedAt' unix timestamp of the article or None if unknown
+        :param video_likelihood: the probability in [0, 1] that the article contains a video
+        :param deprioritized: whether the article should only be crawled after all other articles
+        """
+        if deprioritized:
+            published_at = (published_at or 0) - self.deprioritized_delay.total_seconds()
+        if published_at is None:
+            published_at = 0  # articles without a publishing time are treated as the oldest ones
+        language_weight = self.language_weights.get(language, 1.0)
+        weight = language_weight * (1 + self.video_weight * video_likelihood)
+        return published_at + self.recency_half_life.total_seconds() * math.log2(weight)
+
+
+class CrawlQueue:
+    """
+    An in-memory priority queue of articles waiting to be crawled. Articles are split into a live lane for freshly
+    published articles and a backfill lane for older ones; the backfill lane is only served if the live lane is empty.
+    Articles which leave the live window while they are queued are moved to the backfill lane before the queue is
+    popped or counted, so the lane counts are exact.
+    This class is not synchronized, the owner has to guard access with its own lock.
+    """
+
+    def __init__(self, policy: CrawlPriorityPolicy = None):
+        self.policy = policy
+        if policy is None:
+            self.policy = CrawlPriorityPolicy()
+        self.lanes = {CrawlPriorityPolicy.live_lane: [], CrawlPriorityPolicy.backfill_lane: []}
+        self.lane_counts = {CrawlPriorityPolicy.live_lane: 0, CrawlPriorityPolicy.backfill_lane: 0}
+        self.live_expiry = []  # the entries of the live lane ordered by their publishing time, oldest first
+        self.entries = {}  # maps (id, language) to the currently valid heap entry of an article
+        self.counter = itertools.count()  # keeps the insertion order for articles with the same priority
+
+    def push(self, article_id: str, language: str, published_at: Optional[int], video_likelihood: float = 0.5,
+             deprioritized: bool = False):
+        key = (article_id, language)
+        self.remove(article_id, language)
+        lane = CrawlPriorityPolicy.backfill_lane if deprioritized else self.policy.get_lane(published_at)
+        priority = self.policy.get_priority(language, published_at, video_likelihood, deprioritized)
+        entry = [-priority, next(self.counter), key, lane, published_at]
+        self.entries[key] = entry
+        self.lane_counts[lane] += 1
+        heapq.heappush(self.lanes[lane], entry)
+        if lane == CrawlPriorityPolicy.live_lane:
+            heapq.heappush(self.live_expiry, (published_at, entry[1], entry))
+
+    def remove(self, article_id: str, language: str):
+        entry = self.entries.pop((article_id, language), None)
+        if entry is not None:
+            self.lane_counts[entry[3]] -= 1
+            entry[2] = None  # mark the entry as invalid, it gets discarded lazily when it reaches the top of the heap
+
+    def pop(self) -> Optional[Tuple[str, str]]:
+        """
+        Removes and returns the (id, language) of the article with the highest priority, preferring the live lane.
+        :return: a tuple of (id, language) or None if the queue is empty
+        """
+        self.expire_live_lane()
+        for lane in [CrawlPriorityPolicy.live_lane, CrawlPriorityPolicy.backfill_lane]:
+            heap = self.lanes[lane]
+            while len(heap) > 0:
+                entry = heapq.heappop(heap)
+                # skip removed entries and entries which were moved from the live to the backfill lane
+                if entry[2] is not None and entry[3] == lane:
+                    del self.entries[entry[2]]
+                    self.lane_counts[lane] -= 1
+                    return entry[2]
+        return None
+
+    def expire_live_lane(self):
+        """
+        Moves all articles which left the live window to the backfill lane. Their entries stay in the live heap and
+        are discarded lazily when they reach its top.
+        """
+        while len(self.live_expiry) > 0:
+            published_at, _, entry = self.live_expiry[0]
+            if self.policy.get_lane(published_at) == CrawlPriorityPolicy.live_lane:
+                return
+            heapq.heappop(self.live_expiry)
+            if entry[2] is not None and entry[3] == CrawlPriorityPolicy.live_lane:
+                entry[3] = CrawlPriorityPolicy.backfill_lane
+                self.lane_counts[CrawlPriorityPolicy.live_lane] -= 1
+                self.lane_counts[CrawlPriorityPolicy.backfill_lane] += 1
+                heapq.heappush(self.lanes[CrawlPriorityPolicy.backfill_lane], entry)
+
+    def clear(self):
+        for heap in self.lanes.values():
+            heap.clear()
+        self.live_expiry.clear()
+        for lane in self.lane_counts:
+            self.lane_counts[lane] = 0
+        self.entries.clear()
+
+    def count(self, lane: str = None) -> int:
+        if lane is None:
+            return len(self.entries)
+        self.expire_live_lane()
+        return self.lane_counts[lane]
+
+    def __len__(self):
+        return len(self.entries)
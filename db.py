@@ -1,10 +1,13 @@
 import os
+import json
+import hashlib
 import logging
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from tinydb import TinyDB, Query
 from tinydb.operations import add, set
 from datetimerange import DateTimeRange
 from api_crawler import Website
+from crawl_queue import CrawlQueue, CrawlPriorityPolicy
 from threading import Lock
 from tinydb.storages import JSONStorage
 from tinydb.middlewares import CachingMiddleware
@@ -14,25 +17,82 @@ class Database:
     website_type = "website"
     article_type = "article"
 
-    def __init__(self, working_dir: str):
+    def __init__(self, working_dir: str, policy: CrawlPriorityPolicy = None):
         assert os.path.isdir(working_dir), "working directory does not exist or is not valid"
         self.storage_file = os.path.join(working_dir, "db.json")
+        self.progress_file = os.path.join(working_dir, "progress.json")  # checkpoint of the crawl progress
         self.db = TinyDB(self.storage_file, storage=CachingMiddleware(JSONStorage), indent=4)
         self.lock = Lock()
-        self.languages = ["www", "de", "fr", "it", "es", "pt", "ru", "tr", "gr", "hu", "per", "arabic"]
+        self.queue = CrawlQueue(policy)  # the articles waiting to be crawled, ordered by priority
+        self.progress_version, self.progress = self.load_progress_checkpoint()
+        with self.lock:
+            self.load_queue()
 
-    def store_website(self, website: Website):
+    def store_progress(self, websites: List[Website]):
+        """
+        Writes a new checkpoint with the crawl progress of all websites. The checkpoint is written to a temporary file
+        first and then renamed, so a crash can never leave a partially written checkpoint behind.
+        The cached articles are flushed to disk before, because the articles of a queried time range are stored before
+        the range is marked as queried, so the checkpoint never marks a range whose articles could still get lost.
+        :param websites: the websites to store the queried time ranges for
+        """
+        snapshots = {}
+        for website in websites:
+            snapshots[website.language] = website.get_snapshot()
         try:
             with self.lock:
-                website_query = self.create_website_query(website.language)
-                obj = self.create_website_object(website)
-                obj["time_ranges"] = self.convert_from_datetime_range(website.queried_timeranges)
-                self.get_website_db().upsert(obj, website_query)
+                self.db.storage.flush()
+                progress = {}
+                for language, (version, time_ranges) in snapshots.items():
+                    progress[language] = {"version": version,
+                                          "time_ranges": self.convert_from_datetime_range(time_ranges)}
+                checkpoint = {"version": self.progress_version + 1, "websites": progress,
+                              "checksum": self.create_checksum(progress)}
+                temp_file = f"{self.progress_file}.tmp"
+                with open(temp_file, "w") as f:
+                    f.write(json.dumps(checkpoint, indent=4))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.progress_file)
+                self.progress_version += 1
+                self.progress = progress
+        except Exception as e:
+            logging.exception(e)
+            return
+        for website in websites:
+            website.mark_persisted(snapshots[website.language][0])
+
+    def load_progress_checkpoint(self) -> Tuple[int, dict]:
+        """
+        Loads and validates the last checkpoint of the crawl progress.
+        :return: a tuple of (version, progress per language) or (0, {}) if no valid checkpoint exists
+        """
+        if not os.path.isfile(self.progress_file):
+            return 0, {}
+        try:
+            with open(self.progress_file, "r") as f:
+                checkpoint = json.load(f)
+            progress = checkpoint["websites"]
+            if checkpoint["checksum"] != self.create_checksum(progress):
+                raise ValueError("checksum does not match")
+            for website_progress in progress.values():
+                for time_range in self.convert_to_datetime_range(website_progress["time_ranges"]):
+                    if time_range.start_datetime > time_range.end_datetime:
+                        raise ValueError(f"invalid time range {time_range}")
+            logging.info(f"Loaded progress checkpoint version {checkpoint['version']}")
+            return checkpoint["version"], progress
         except Exception as e:
+            logging.error(f"Ignoring invalid progress checkpoint {self.progress_file}")
             logging.exception(e)
+            return 0, {}
 
     def load_website(self, language: str) -> list:
         with self.lock:
+            if language in self.progress:
+                result = self.convert_to_datetime_range(self.progress[language]["time_ranges"])
+                logging.info(f"Continue language {language} after {result}")
+                return result
+            # fall back to the progress stored in the database before checkpoints were introduced
             website_query = self.create_website_query(language)
             found_objects = self.get_website_db().search(website_query)
             if len(found_objects) > 1:
@@ -44,7 +104,8 @@ class Database:
             else:
                 return []
 
-    def store_article(self, article_id: str, language: str, full_url: str, article_dir: str):
+    def store_article(self, article_id: str, language: str, full_url: str, article_dir: str,
+                      published_at: int = None, prediction: dict = None):
         with self.lock:
             article_query = self.create_article_query(article_id, language)
             articles = self.get_article_db()
@@ -54,31 +115,96 @@ class Database:
             obj["full_url"] = full_url
             obj["crawl_status"] = 0
             obj["article_dir"] = article_dir
+            obj["published_at"] = published_at
+            if prediction is not None:
+                obj.update(prediction)
             articles.insert(obj)
+            self.enqueue_article(obj)
+
+    def store_skipped_article(self, article_id: str, language: str, full_url: str, article_dir: str,
+                              published_at: int = None, prediction: dict = None):
+        """
+        Stores an article whose page is not crawled because it was predicted to contain no video.
+        """
+        with self.lock:
+            article_query = self.create_article_query(article_id, language)
+            skipped_articles = self.get_skipped_db()
+            # skip this article if it is already skipped or queued for crawling
+            if any(skipped_articles.search(article_query)) or any(self.get_article_db().search(article_query)):
+                return
+            obj = self.create_article_object(article_id, language)
+            obj["full_url"] = full_url
+            obj["article_dir"] = article_dir
+            obj["published_at"] = published_at
+            if prediction is not None:
+                obj.update(prediction)
+            skipped_articles.insert(obj)
+
+    def get_skipped_articles(self) -> list:
+        with self.lock:
+            return self.get_skipped_db().all()
+
+    def get_skipped_article_count(self) -> int:
+        with self.lock:
+            return len(self.get_skipped_db())
+
+    def is_known_article(self, article_id: str, language: str) -> bool:
+        """
+        Returns whether an article is already stored for crawling or was skipped.
+        """
+        with self.lock:
+            article_query = self.create_article_query(article_id, language)
+            return any(self.get_article_db().search(article_query)) or any(self.get_skipped_db().search(article_query))
+
+    def requeue_skipped_article(self, article: dict, prediction: dict):
+        """
+        Moves a skipped article back into the crawl queue.
+        :param article: the article as stored in the skipped articles
+        :param prediction: the new prediction to store with the article
+        """
+        with self.lock:
+            self.get_skipped_db().remove(self.create_article_query(article["id"], article["language"]))
+        self.store_article(article["id"], article["language"], article["full_url"], article["article_dir"],
+                           article.get("published_at"), prediction)
+
+    def get_article(self, article_id: str, language: str) -> Optional[dict]:
+        with self.lock:
+            found_objects = self.get_article_db().search(self.create_article_query(article_id, language))
+            return found_objects[0] if len(found_objects) > 0 else None
 
     def get_article_to_crawl(self) -> Optional[Tuple[str, str, str, str]]:
         """
-        Returns a tuple with the id, language, url and storage directory an article to crawl if possible, else None.
+        Returns a tuple with the id, language, url and storage directory of the article with the highest priority in the
+        crawl queue. Fresh articles of the live lane are always returned before articles of the backfill lane.
         As a sideeffect, it updates the status for this article so it does not get crawled again
-        :return: a tuple of (id, language, url, storage_dir) or None if no article could be found
+        :return: a tuple of (id, language, url, storage_dir) or a tuple of None if no article could be found
         """
         with self.lock:
-            article_query = Query()
             articles = self.get_article_db()
-            language = self.languages.pop(0)
-            self.languages.append(language)
-            found_articles = articles.search(
-                (article_query.type == self.article_type) & (article_query.crawl_status == 0)
-                & (article_query.language == language))
-            logging.info(f"[{language}]Search article to download in db")
-            if len(found_articles) > 0:
+            while len(self.queue) > 0:
+                id, language = self.queue.pop()
+                article_query = self.create_article_query(id, language) & (Query().crawl_status == 0)
+                found_articles = articles.search(article_query)
+                if len(found_articles) == 0:  # the article was removed or is already being crawled
+                    continue
                 article = found_articles[0]
-                id = article["id"]
-                language = article["language"]
-                article_query = self.create_article_query(id, language)
                 articles.update(set("crawl_status", 1), article_query)
                 return id, language, article["full_url"], article["article_dir"]
-            return None, language, None, None
+            return None, None, None, None
+
+    def enqueue_article(self, article: dict):
+        self.queue.push(article["id"], article["language"], article.get("published_at"),
+                        article.get("video_likelihood", 0.5), article.get("video_deprioritized", False))
+
+    def load_queue(self):
+        """
+        Rebuilds the crawl queue from all articles in the database which are not downloaded yet.
+        """
+        self.queue.clear()
+        article_query = Query()
+        article_query = (article_query.type == self.article_type) & (article_query.crawl_status == 0)
+        for article in self.get_article_db().search(article_query):
+            self.enqueue_article(article)
 
     def increment_crawled_article_status(self, article_id: str, language: str, amount: int = 1):
         with self.lock:
@@ -111,6 +237,7 @@ class Database:
                 logging.error(f"language {language} has multiple articles with id {article_id} stored in db")
             if any(found_objects):
                 articles.update(set("crawl_status", 0), article_query)
+                self.enqueue_article(found_objects[0])
         self.delete_downloaded_articles()
 
     def reset_crawled_articles_status(self):
@@ -124,6 +251,7 @@ class Database:
             article_query = (article_query.type == self.article_type) & (article_query.crawl_status >= 1) \
                             & (article_query.crawl_status < 3)
             articles.update(set("crawl_status", 0), article_query)
+            self.load_queue()
 
     def move_article_to_error_list(self, article_id: str, language: str):
         with self.lock:
@@ -136,12 +264,18 @@ class Database:
                 logging.error(f"language {language} has multiple articles with id {article_id} stored in db")
             if any(found_objects):
                 articles.remove(article_query)
+                self.queue.remove(article_id, language)
                 for obj in found_objects:
                     self.get_error_db().insert(obj)
 
-
-    def get_not_downloaded_article_count(self):
+    def get_not_downloaded_article_count(self, lane: str = None):
+        """
+        Returns the number of articles waiting to be crawled.
+        :param lane: if given, only articles of this lane of the crawl queue are counted
+        """
         with self.lock:
+            if lane is not None:
+                return self.queue.count(lane)
             article_query = Query()
             article_query = article_query.crawl_status == 0
             articles = self.get_article_db()
@@ -154,6 +288,23 @@ class Database:
             articles = self.get_article_db()
             logging.info(f"Currently fetched articles ready to download: {articles.count(article_query)}")
 
+    def store_video_statistics(self, language: str, signature: str, pages: int, pages_with_video: int):
+        with self.lock:
+            query = Query()
+            query = (query.language == language) & (query.signature == signature)
+            obj = {"language": language, "signature": signature, "pages": pages, "pages_with_video": pages_with_video}
+            self.get_video_statistics_db().upsert(obj, query)
+
+    def load_video_statistics(self) -> dict:
+        """
+        Returns the learned video statistics as a dict mapping (language, signature) to [pages, pages with video].
+        """
+        with self.lock:
+            result = {}
+            for obj in self.get_video_statistics_db().all():
+                result[(obj["language"], obj["signature"])] = [obj["pages"], obj["pages_with_video"]]
+            return result
+
     def create_article_object(self, article_id: str, language: str) -> dict:
         return {
             "type": self.article_type,
@@ -166,12 +317,6 @@ class Database:
         query = (query.type == self.article_type) & (query.id == article_id) & (query.language == language)
         return query
 
-    def create_website_object(self, website: Website):
-        return {
-            "type": self.website_type,
-            "language": website.language
-        }
-
     def create_website_query(self, language: str):
         query = Query()
         query = (query.type == self.website_type) & (query.language == language)
@@ -186,6 +331,16 @@ class Database:
     def get_error_db(self):
         return self.db.table("download_errors")
 
+    def get_skipped_db(self):
+        return self.db.table("skipped_articles")
+
+    def get_video_statistics_db(self):
+        return self.db.table("video_statistics")
+
+    @staticmethod
+    def create_checksum(progress: dict) -> str:
+        return hashlib.sha256(json.dumps(progress, sort_keys=True).encode("utf-8")).hexdigest()
+
     @staticmethod
     def convert_from_datetime_range(time_ranges):
         result = []
@@ -0,0 +1,238 @@
+from typing import Iterator, List, Optional
+from threading import Lock
+from contextlib import contextmanager
+import argparse
+import datetime
+import fcntl
+import json
+import logging
+import os
+import sys
+
+
+class Manifest:
+    """
+    An index over the collected articles with one manifest file per language. Every update of an article is appended
+    as a json line, later lines overwrite the fields of earlier lines with the same id. This allows to query the corpus
+    without opening the files of every article.
+    Writers hold an exclusive lock on a lock file next to the manifest, so a compaction in another process (e.g. the
+    command line) never drops lines the crawler appends at the same time.
+    """
+    manifest_file_name = "manifest.jsonl"
+    subtitle_extensions = (".vtt", ".srt", ".ttml", ".srv1", ".srv2", ".srv3")
+    subtitle_prefixes = ("audio.mp3.", "audio.")  # the longer prefix has to be checked first
+
+    def __init__(self, working_dir: str):
+        assert os.path.isdir(working_dir), "path is not a directory"
+        self.working_dir = working_dir
+        self.lock = Lock()
+
+    def update(self, article_id: str, language: str, **fields):
+        """
+        Updates the manifest record of an article with the given fields.
+        """
+        record = {"id": str(article_id), "language": language}
+        record.update(fields)
+        with self.lock_manifest(language):
+            with open(self.get_manifest_file(language), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    @contextmanager
+    def lock_manifest(self, language: str):
+        """
+        Locks the manifest of a language for writing, across threads and processes.
+        """
+        manifest_file = self.get_manifest_file(language)
+        with self.lock:
+            os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+            with open(f"{manifest_file}.lock", "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def update_meta(self, article_id: str, language: str, meta: dict, article_dir: str):
+        self.update(article_id, language, published_at=meta.get("publishedAt"), article_dir=article_dir)
+
+    def update_text(self, article_id: str, language: str, text: str):
+        self.update(article_id, language, text_length=len(text))
+
+    def update_audio(self, article_id: str, language: str, article_dir: str, duration: Optional[float] = None):
+        audio_file = os.path.join(article_dir, "audio.mp3")
+        audio_size = os.path.getsize(audio_file) if os.path.isfile(audio_file) else None
+        self.update(article_id, language, audio_size=audio_size, audio_duration=duration,
+                    subtitles=self.find_subtitles(article_dir))
+
+    def find_subtitles(self, article_dir: str) -> List[str]:
+        """
+        Returns the languages of the subtitle files youtube-dl stored next to the audio file. Because the downloaded
+        webm is stored as 'audio.mp3', youtube-dl keeps the whole file name, e.g. 'audio.mp3.de.vtt'.
+        """
+        result = []
+        for file_name in os.listdir(article_dir):
+            if not file_name.startswith("audio.") or not file_name.endswith(self.subtitle_extensions):
+                continue
+            name = os.path.splitext(file_name)[0]
+            for prefix in self.subtitle_prefixes:
+                if name.startswith(prefix) and len(name) > len(prefix):
+                    result.append(name[len(prefix):])
+                    break
+        return sorted(result)
+
+    def load(self, language: str) -> dict:
+        """
+        Returns the merged records of all articles of a language by their id.
+        """
+        with self.lock:
+            return self.read_records(language)
+
+    def read_records(self, language: str) -> dict:
+        result = {}
+        manifest_file = self.get_manifest_file(language)
+        if not os.path.isfile(manifest_file):
+            return result
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning(f"[{language}] Skipping corrupt line in manifest: {line}")
+                    continue
+                result.setdefault(record["id"], {}).update(record)
+        return result
+
+    def query(self, languages: List[str] = None, published_after: datetime.datetime = None,
+              published_before: datetime.datetime = None, has_text: bool = None, has_audio: bool = None,
+              has_subtitles: bool = None) -> Iterator[dict]:
+        """
+        Streams the records of all articles matching the given filters, a filter set to None is ignored.
+        :param languages: the languages to export, defaults to all languages with a manifest
+        :param published_after: only articles published at or after this utc time
+        :param published_before: only articles published before this utc time
+        :param has_text: whether the article text has to be (or must not be) stored
+        :param has_audio: whether the audio has to be (or must not be) stored
+        :param has_subtitles: whether subtitles have to be (or must not be) stored
+        """
+        if languages is None:
+            languages = self.get_languages()
+        after = None if published_after is None else published_after.replace(tzinfo=datetime.timezone.utc).timestamp()
+        before = None if published_before is None else \
+            published_before.replace(tzinfo=datetime.timezone.utc).timestamp()
+        for language in languages:
+            for record in self.load(language).values():
+                published_at = record.get("published_at")
+                if after is not None and (published_at is None or published_at < after):
+                    continue
+                if before is not None and (published_at is None or published_at >= before):
+                    continue
+                if has_text is not None and (record.get("text_length", 0) > 0) != has_text:
+                    continue
+                if has_audio is not None and (record.get("audio_size") is not None) != has_audio:
+                    continue
+                if has_subtitles is not None and (len(record.get("subtitles", [])) > 0) != has_subtitles:
+                    continue
+                yield record
+
+    def compact(self, language: str):
+        """
+        Rewrites the manifest of a language with a single line per article.
+        """
+        with self.lock_manifest(language):
+            self.write_records(language, self.read_records(language))
+
+    def write_records(self, language: str, records: dict):
+        """
+        Replaces the manifest of a language with the given records, the manifest has to be locked by the caller.
+        """
+        manifest_file = self.get_manifest_file(language)
+        temp_file = f"{manifest_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            for record in records.values():
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, manifest_file)
+
+    def rebuild(self, language: str):
+        """
+        Rebuilds the manifest of a language by scanning the article directories once, used for articles which were
+        collected before the manifest existed. The scanned fields overwrite the fields of existing records, fields only
+        known from the crawl (e.g. the audio duration) and records appended during the scan are kept.
+        """
+        language_dir = os.path.join(self.working_dir, language)
+        if not os.path.isdir(language_dir):
+            logging.warning(f"[{language}] Skipping rebuild of manifest because {language_dir} does not exist")
+            return
+        records = {}
+        for article_id in os.listdir(language_dir):
+            article_dir = os.path.join(language_dir, article_id)
+            if not os.path.isdir(article_dir):
+                continue
+            record = {"id": article_id, "language": language, "article_dir": article_dir}
+            meta_file = os.path.join(article_dir, "meta.json")
+            if os.path.isfile(meta_file):
+                with open(meta_file, "r") as f:
+                    record["published_at"] = json.load(f).get("publishedAt")
+            text_file = os.path.join(article_dir, "article.txt")
+            if os.path.isfile(text_file):
+                with open(text_file, "r", encoding="utf-8") as f:
+                    record["text_length"] = len(f.read())
+            audio_file = os.path.join(article_dir, "audio.mp3")
+            if os.path.isfile(audio_file):
+                record["audio_size"] = os.path.getsize(audio_file)
+            record["subtitles"] = self.find_subtitles(article_dir)
+            records[article_id] = record
+        with self.lock_manifest(language):
+            merged_records = self.read_records(language)
+            for article_id, record in records.items():
+                merged_records.setdefault(article_id, {}).update(record)
+            self.write_records(language, merged_records)
+        logging.info(f"[{language}] Rebuilt manifest with {len(records)} articles")
+
+    def get_languages(self) -> List[str]:
+        return sorted(language for language in os.listdir(self.working_dir)
+                      if os.path.isfile(self.get_manifest_file(language)))
+
+    def get_manifest_file(self, language: str) -> str:
+        return os.path.join(self.working_dir, language, self.manifest_file_name)
+
+
+def parse_date(value: str) -> datetime.datetime:
+    return datetime.datetime.strptime(value, "%Y-%m-%d")
+
+
+def parse_flag(value: str) -> bool:
+    return value.lower() in ["1", "true", "yes"]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the records of collected articles as json lines")
+    parser.add_argument("--data", default=os.path.join(".", "data"), help="the working directory of the crawler")
+    parser.add_argument("--language", action="append", dest="languages", help="the languages to export")
+    parser.add_argument("--after", type=parse_date, help="only articles published at or after this date (YYYY-MM-DD)")
+    parser.add_argument("--before", type=parse_date, help="only articles published before this date (YYYY-MM-DD)")
+    parser.add_argument("--text", type=parse_flag, help="whether the article text has to exist (true/false)")
+    parser.add_argument("--audio", type=parse_flag, help="whether the audio has to exist (true/false)")
+    parser.add_argument("--subtitles", type=parse_flag, help="whether subtitles have to exist (true/false)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="rebuild the manifests by scanning the article files, safe while the crawler is running "
+                             "because writers synchronize on manifest.jsonl.lock (requires a local file system)")
+    parser.add_argument("--compact", action="store_true",
+                        help="rewrite the manifests with one line per article, safe while the crawler is running "
+                             "because writers synchronize on manifest.jsonl.lock (requires a local file system)")
+    args = parser.parse_args()
+
+    manifest = Manifest(args.data)
+    if args.rebuild or args.compact:
+        languages = args.languages
+        if languages is None:
+            languages = sorted(name for name in os.listdir(args.data) if os.path.isdir(os.path.join(args.data, name)))
+        for language in languages:
+            if args.rebuild:
+                manifest.rebuild(language)
+            else:
+                manifest.compact(language)
+    else:
+        for record in manifest.query(args.languages, args.after, args.before, args.text, args.audio, args.subtitles):
+            sys.stdout.write(json.dumps(record) + "\n")
@@ -1,7 +1,11 @@
 import youtube_dl
 
 from api_crawler import Crawler
+from connections import ConnectionManager
 from db import Database
+from video_predictor import VideoPredictor
+from manifest import Manifest
+from typing import Optional
 from lxml import html
 import requests
 import logging
@@ -36,10 +40,14 @@ class PageCrawler(Crawler):
         "cookiefile": "./cookies.txt"
     }
 
-    def __init__(self, database: Database, max_requests, limit_bandwidth=True):
-        super().__init__(max_requests)
+    def __init__(self, database: Database, max_requests, limit_bandwidth=True,
+                 predictor: Optional[VideoPredictor] = None, manifest: Optional[Manifest] = None,
+                 connections: Optional[ConnectionManager] = None):
+        super().__init__(max_requests, connections)
         self.max_requests = max_requests
         self.db = database
+        self.predictor = predictor
+        self.manifest = manifest
         self.request_context = {}
         if not limit_bandwidth:
             del self.youtube_dl_properties["ratelimit"]
@@ -59,7 +67,7 @@ class PageCrawler(Crawler):
                              lambda session, response: self.handle_crawl_response(tuple, response),
                              {}, headers)
         else:
-            self.get_logger().info(f"[{language}]No articles left to crawl")
+            self.get_logger().info(f"No articles left to crawl")
             return
         time.sleep(2)
 
@@ -83,6 +91,8 @@ class PageCrawler(Crawler):
     def store_response(self, id: str, language: str, output_dir: str, response: requests.Response):
         root_node = html.fromstring(response.content)
         video_ids = self.extract_video_ids(root_node)
+        if self.predictor is not None:
+            self.predictor.record_outcome(language, self.db.get_article(id, language), len(video_ids) > 0)
         if len(video_ids) == 0:
             self.get_logger().debug("[%s] No video in article %s in dir %s", language, id, output_dir)
             self.db.increment_crawled_article_status(id, language, 2)  # mark this article as finished in db
@@ -117,6 +127,8 @@ class PageCrawler(Crawler):
                 self.get_logger().warning(f"[{language}] No article for {id} was downloaded")
             with open(output_file, "w", encoding="utf-8") as f:
                 f.write(article)
+            if self.manifest is not None:
+                self.manifest.update_text(id, language, article)
             self.db.increment_crawled_article_status(id, language)
         except Exception as e:
             self.get_logger().exception(e)
@@ -152,12 +164,16 @@ class PageCrawler(Crawler):
     def download_video(self, id: str, language: str, video_id: str, output_dir):
         try:
             # if the fetched video starts with an https, we did not find a youtube video id, but a full url
+            info = None
             if "https" in video_id and (".mp3" in video_id or ".mp4" in video_id):
                 self.get_logger().debug(f"Normal download of {video_id}")
                 self.normal_download(video_id, output_dir)
             else:
                 self.get_logger().debug(f"Youtube download of {video_id}")
-                self.youtube_download(language, video_id, output_dir)
+                info = self.youtube_download(language, video_id, output_dir)
+            if self.manifest is not None:
+                duration = info.get("duration") if info is not None else None
+                self.manifest.update_audio(id, language, output_dir, duration)
             self.db.increment_crawled_article_status(id, language)
         except youtube_dl.utils.ExtractorError as ee:
             # self.db.reset_crawled_article_status(id, language)
@@ -173,18 +189,17 @@ class PageCrawler(Crawler):
             self.db.reset_crawled_article_status(id, language)
             self.get_logger().exception(e)
 
-    def youtube_download(self, language, video_id, output_dir):
+    def youtube_download(self, language, video_id, output_dir) -> Optional[dict]:
         url = f"{self.youtube_url}{video_id}"
         if language == "www":
             language = "en"
         download_properties = self.youtube_dl_properties.copy()
-        download_properties["outtmpl"] = f'{output_dir}/audio.mp3'
         download_properties["subtitleslangs"] = [language]
-        tube = youtube_dl.YoutubeDL(download_properties)
-        tube.download([url])
+        # downloads the video with a youtube-dl instance shared for equal properties and returns its info
+        return self.connections.youtube_download(url, download_properties, f'{output_dir}/audio.mp3')
 
     def normal_download(self, video_url, output_dir):
-        response = requests.get(video_url)
+        response = self.connections.get_session().get(video_url)
         if response.status_code != 200:
             return
         with open(os.path.join(output_dir, "audio.mp3"), "wb") as f:
@@ -1,4 +1,4 @@
-import requests
+from connections import ConnectionManager
 from lxml import html, etree
 from page_crawler import PageCrawler
 from db import Database
@@ -46,8 +46,9 @@ class TestCrawler(PageCrawler):
 
 def test_double_video_description():
     url = "https://per.euronews.com/2020/07/26/hurricane-hanna-disaster-declaration-texas"
-    response = requests.get(url)
-    crawler = TestCrawler(TestDB(), 1)
+    connections = ConnectionManager()
+    response = connections.get_session().get(url)
+    crawler = TestCrawler(TestDB(), 1, connections=connections)
     crawler.request_context[url] = (id, "per", ".")
     crawler.lock.acquire()
     crawler.handle_crawl_response(None, response)
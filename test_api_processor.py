@@ -0,0 +1,30 @@
+from api_crawler import Website
+from api_processor import ApiProcessor
+from db import Database
+from video_predictor import VideoPredictor
+import time
+
+
+def create_response(article_id: int) -> dict:
+    return {"id": article_id, "fullUrl": f"/article/{article_id}", "publishedAt": int(time.time()) - 10 ** 6}
+
+
+def test_known_articles_are_not_predicted_again(tmp_path):
+    db = Database(str(tmp_path))
+    predictor = VideoPredictor(db, default_likelihood=0.01, skip_threshold=0.02, exploration_rate=0.0)
+    processor = ApiProcessor(db, str(tmp_path), predictor)
+    website = Website("euronews.com", language="de")
+    for _ in range(3):  # the newest articles are fetched again every hour
+        processor.handle_response(website, create_response(1))
+        processor.handle_response(website, create_response(2))
+    assert predictor.metrics["predicted"] == 2
+    assert db.is_known_article(1, "de")
+    assert not db.is_known_article(3, "de")
+
+
+def test_queued_articles_are_not_skipped(tmp_path):
+    db = Database(str(tmp_path))
+    db.store_article(1, "de", "https://de.euronews.com/article/1", str(tmp_path), None)
+    db.store_skipped_article(1, "de", "https://de.euronews.com/article/1", str(tmp_path), None)
+    assert db.get_skipped_article_count() == 0
+    assert db.get_not_downloaded_article_count() == 1
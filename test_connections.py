@@ -0,0 +1,65 @@
+from api_crawler import Crawler
+from connections import ConnectionManager
+import connections
+import logging
+import requests
+
+
+class FakeYoutubeDL:
+    instances = []
+
+    def __init__(self, params: dict):
+        self.params = dict(params)
+        self.output_templates = []
+        FakeYoutubeDL.instances.append(self)
+
+    def extract_info(self, url: str) -> dict:
+        self.output_templates.append(self.params["outtmpl"])
+        return {"webpage_url": url, "duration": 60}
+
+
+def test_sessions_share_adapter_and_cookies(tmp_path):
+    cookie_file = tmp_path / "cookies.txt"
+    cookie_file.write_text("# Netscape HTTP Cookie File\n"
+                           ".youtube.com\tTRUE\t/\tTRUE\t2147483647\tCONSENT\tYES+\n")
+    manager = ConnectionManager(str(cookie_file))
+    first = manager.configure_session(requests.Session())
+    second = manager.configure_session(requests.Session())
+    for session in [first, second, manager.get_session()]:
+        assert session.get_adapter("https://de.euronews.com") is manager.adapter
+        assert session.get_adapter("http://de.euronews.com") is manager.adapter
+        assert session.cookies is manager.cookies
+    assert manager.cookies.get("CONSENT", domain=".youtube.com") == "YES+"
+
+
+def test_stopping_a_crawler_keeps_the_shared_pools(tmp_path):
+    manager = ConnectionManager(None)
+    other_session = manager.configure_session(requests.Session())
+    manager.adapter.poolmanager.connection_from_url("https://de.euronews.com")  # a pool used by the other session
+    crawler = Crawler(1, manager)
+    crawler.stop()
+    assert len(manager.adapter.poolmanager.pools) == 1
+    assert other_session.get_adapter("https://de.euronews.com") is manager.adapter
+    assert crawler.session.get_adapter("https://de.euronews.com") is not manager.adapter
+
+
+def test_youtube_dl_instances_are_reused_for_equal_properties(monkeypatch):
+    FakeYoutubeDL.instances = []
+    monkeypatch.setattr(connections.youtube_dl, "YoutubeDL", FakeYoutubeDL)
+    manager = ConnectionManager(None)
+    properties = {"format": "251", "subtitleslangs": ["de"], "ratelimit": 50000,
+                  "logger": logging.getLogger("youtube")}
+    manager.youtube_download("https://youtube.com/watch?v=1", properties, "data/de/1/audio.mp3")
+    info = manager.youtube_download("https://youtube.com/watch?v=2", dict(properties), "data/de/2/audio.mp3")
+    assert info["duration"] == 60
+    assert len(FakeYoutubeDL.instances) == 1
+    assert FakeYoutubeDL.instances[0].output_templates == ["data/de/1/audio.mp3", "data/de/2/audio.mp3"]
+
+    unlimited = {name: value for name, value in properties.items() if name != "ratelimit"}
+    manager.youtube_download("https://youtube.com/watch?v=3", unlimited, "data/de/3/audio.mp3")
+    manager.youtube_download("https://youtube.com/watch?v=4", dict(properties, subtitleslangs=["fr"]),
+                             "data/fr/4/audio.mp3")
+    assert len(FakeYoutubeDL.instances) == 3
+    assert "ratelimit" not in FakeYoutubeDL.instances[1].params
+    assert manager.get_statistics()["youtube_downloads"] == 4
+    assert manager.get_statistics()["youtube_instances"] == 3
@@ -0,0 +1,77 @@
+from crawl_queue import CrawlQueue, CrawlPriorityPolicy
+import datetime
+import time
+
+
+def test_live_lane_before_backfill():
+    now = int(time.time())
+    queue = CrawlQueue()
+    queue.push("old", "de", now - 10 ** 7, video_likelihood=1.0)
+    queue.push("unknown", "de", None)
+    queue.push("fresh", "fr", now - 60, video_likelihood=0.0)
+    assert queue.count(CrawlPriorityPolicy.live_lane) == 1
+    assert queue.count(CrawlPriorityPolicy.backfill_lane) == 2
+    assert [queue.pop() for _ in range(4)] == [("fresh", "fr"), ("old", "de"), ("unknown", "de"), None]
+    assert queue.count(CrawlPriorityPolicy.live_lane) == 0
+    assert queue.count(CrawlPriorityPolicy.backfill_lane) == 0
+
+
+def test_priority_does_not_depend_on_push_time():
+    half_life = datetime.timedelta(days=1)
+    policy = CrawlPriorityPolicy(recency_half_life=half_life, language_weights={"de": 2.0})
+    queue = CrawlQueue(policy)
+    now = int(time.time())
+    # twice the weight equals one half life, so the older german article wins against a slightly newer one
+    queue.push("fr", "fr", now - 10 ** 6, video_likelihood=0.0)
+    queue.push("de", "de", now - 10 ** 6 - half_life.total_seconds() + 60, video_likelihood=0.0)
+    assert queue.pop() == ("de", "de")
+    assert policy.get_priority("fr", 1000) == CrawlPriorityPolicy(recency_half_life=half_life).get_priority("fr", 1000)
+
+
+def test_expired_live_articles_move_to_backfill():
+    policy = CrawlPriorityPolicy(live_window=datetime.timedelta(hours=1))
+    queue = CrawlQueue(policy)
+    now = int(time.time())
+    queue.push("fresh", "de", now - 60)
+    queue.push("backfill", "de", now - 2 * 3600 + 60)
+    policy.live_window = datetime.timedelta(seconds=30)  # the fresh article leaves the live window
+    queue.push("newest", "de", now)
+    assert queue.pop() == ("newest", "de")
+    assert queue.pop() == ("fresh", "de")
+    assert queue.count(CrawlPriorityPolicy.live_lane) == 0
+    assert queue.count(CrawlPriorityPolicy.backfill_lane) == 1
+
+
+def test_lazy_removal():
+    now = int(time.time())
+    queue = CrawlQueue()
+    queue.push("a", "de", now - 10 ** 5)
+    queue.push("b", "de", now - 10 ** 6)
+    queue.push("a", "de", now - 10 ** 7)  # pushing again replaces the old entry
+    queue.remove("b", "de")
+    queue.remove("missing", "de")
+    assert len(queue) == 1
+    assert queue.count(CrawlPriorityPolicy.backfill_lane) == 1
+    assert queue.pop() == ("a", "de")
+    assert queue.pop() is None
+
+
+def test_expired_articles_below_a_live_article_are_counted_as_backfill():
+    policy = CrawlPriorityPolicy(live_window=datetime.timedelta(hours=1))
+    queue = CrawlQueue(policy)
+    now = int(time.time())
+    queue.push("older", "de", now - 600)
+    queue.push("newer", "de", now - 10)
+    policy.live_window = datetime.timedelta(minutes=5)  # only the article below the top of the live lane expires
+    assert queue.count(CrawlPriorityPolicy.live_lane) == 1
+    assert queue.count(CrawlPriorityPolicy.backfill_lane) == 1
+    assert [queue.pop(), queue.pop(), queue.pop()] == [("newer", "de"), ("older", "de"), None]
+
+
+def test_deprioritized_articles_are_crawled_last():
+    now = int(time.time())
+    queue = CrawlQueue()
+    queue.push("fresh", "de", now - 60, video_likelihood=0.0, deprioritized=True)
+    queue.push("old", "de", 0)
+    assert queue.count(CrawlPriorityPolicy.backfill_lane) == 2
+    assert [queue.pop(), queue.pop()] == [("old", "de"), ("fresh", "de")]
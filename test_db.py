@@ -0,0 +1,58 @@
+from api_crawler import EuroNewsCrawler
+from connections import ConnectionManager
+from datetimerange import DateTimeRange
+from db import Database
+import datetime
+import json
+import os
+
+
+def read_checkpoint(db: Database) -> dict:
+    with open(db.progress_file, "r") as f:
+        return json.load(f)
+
+
+def test_progress_is_only_persisted_on_change(tmp_path):
+    db = Database(str(tmp_path))
+    crawler = EuroNewsCrawler(db, 1000, 1, str(tmp_path), ConnectionManager(cookie_file=None))
+    try:
+        crawler.persist_progress()
+        assert not os.path.exists(db.progress_file)  # nothing changed since loading
+        website = crawler.websites[1]
+        start, end = datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 2)
+        db.store_article(1, website.language, f"{website.url}/article/1", str(tmp_path), None)
+        website.update_queried_timestamps(DateTimeRange(start, end))
+        assert website.is_dirty()
+        crawler.persist_progress()
+        assert not website.is_dirty()
+        assert read_checkpoint(db)["version"] == 1
+        with open(db.storage_file, "r") as f:  # the articles of the queried range are flushed with the checkpoint
+            assert len(json.load(f)["articles"]) == 1
+        # a range inside the already queried range does not change the progress
+        website.update_queried_timestamps(DateTimeRange(start + datetime.timedelta(hours=1), end))
+        assert not website.is_dirty()
+        crawler.persist_progress()
+        assert read_checkpoint(db)["version"] == 1
+    finally:
+        crawler.stop()
+
+
+def test_checkpoint_is_loaded_and_validated(tmp_path):
+    db = Database(str(tmp_path))
+    crawler = EuroNewsCrawler(db, 1000, 1, str(tmp_path), ConnectionManager(cookie_file=None))
+    try:
+        website = crawler.websites[1]
+        website.update_queried_timestamps(DateTimeRange(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 2)))
+        crawler.persist_progress()
+    finally:
+        crawler.stop()
+    assert [str(time_range) for time_range in Database(str(tmp_path)).load_website("de")] == \
+           [str(time_range) for time_range in website.queried_timeranges]
+
+    checkpoint = read_checkpoint(db)
+    checkpoint["websites"]["de"]["time_ranges"][0]["start"] = "2010-01-01T00:00:00"  # a torn or edited checkpoint
+    with open(db.progress_file, "w") as f:
+        json.dump(checkpoint, f)
+    reloaded = Database(str(tmp_path))
+    assert reloaded.progress_version == 0
+    assert reloaded.load_website("de") == []
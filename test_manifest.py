@@ -0,0 +1,81 @@
+from manifest import Manifest
+import datetime
+import os
+import subprocess
+import sys
+import time
+
+
+def create_article(working_dir, language: str, article_id: str, files: list) -> str:
+    article_dir = os.path.join(str(working_dir), language, article_id)
+    os.makedirs(article_dir, exist_ok=True)
+    for file_name in files:
+        with open(os.path.join(article_dir, file_name), "wb") as f:
+            f.write(b"0123456789")
+    return article_dir
+
+
+def test_subtitles_use_youtube_dl_file_names(tmp_path):
+    article_dir = create_article(tmp_path, "de", "1", ["audio.mp3", "audio.mp3.de.vtt", "audio.en.srt",
+                                                       "audio.mp3.part", "meta.json"])
+    assert Manifest(str(tmp_path)).find_subtitles(article_dir) == ["de", "en"]
+
+
+def test_updates_are_merged(tmp_path):
+    manifest = Manifest(str(tmp_path))
+    article_dir = create_article(tmp_path, "de", "1", ["audio.mp3", "audio.mp3.de.vtt"])
+    manifest.update_meta("1", "de", {"publishedAt": 1590000000}, article_dir)
+    manifest.update_text("1", "de", "text")
+    manifest.update_audio("1", "de", article_dir, 12.5)
+    records = manifest.load("de")
+    assert records == {"1": {"id": "1", "language": "de", "published_at": 1590000000, "article_dir": article_dir,
+                             "text_length": 4, "audio_size": 10, "audio_duration": 12.5, "subtitles": ["de"]}}
+    manifest.compact("de")
+    with open(manifest.get_manifest_file("de")) as f:
+        assert len(f.readlines()) == 1
+    assert manifest.load("de") == records
+
+
+def test_query_filters(tmp_path):
+    manifest = Manifest(str(tmp_path))
+    with_audio = create_article(tmp_path, "de", "1", ["audio.mp3", "audio.mp3.de.vtt"])
+    without_subtitles = create_article(tmp_path, "de", "2", ["audio.mp3"])
+    manifest.update_meta("1", "de", {"publishedAt": 1590000000}, with_audio)  # 2020-05-20
+    manifest.update_audio("1", "de", with_audio)
+    manifest.update_meta("2", "de", {"publishedAt": 1590000000}, without_subtitles)
+    manifest.update_audio("2", "de", without_subtitles)
+    manifest.update_meta("3", "de", {"publishedAt": 1500000000}, "")  # 2017, no audio
+    manifest.update_meta("4", "fr", {"publishedAt": 1590000000}, "")
+    after, before = datetime.datetime(2020, 1, 1), datetime.datetime(2021, 1, 1)
+    assert [r["id"] for r in manifest.query(["de"], after, before, has_audio=True, has_subtitles=True)] == ["1"]
+    assert sorted(r["id"] for r in manifest.query(["de"], after, before)) == ["1", "2"]
+    assert [r["id"] for r in manifest.query(["de"], has_audio=False)] == ["3"]
+    assert sorted(r["id"] for r in manifest.query(published_after=after)) == ["1", "2", "4"]
+
+
+def test_rebuild_keeps_crawled_fields_and_skips_missing_languages(tmp_path):
+    manifest = Manifest(str(tmp_path))
+    article_dir = create_article(tmp_path, "de", "1", ["audio.mp3", "audio.mp3.de.vtt"])
+    manifest.update_audio("1", "de", article_dir, 12.5)
+    manifest.update_meta("2", "de", {"publishedAt": 1590000000}, "")  # appended for an article without a directory
+    manifest.rebuild("de")
+    manifest.rebuild("missing")
+    records = manifest.load("de")
+    assert records["1"]["audio_duration"] == 12.5
+    assert records["1"]["subtitles"] == ["de"]
+    assert records["2"]["published_at"] == 1590000000
+    assert not os.path.exists(os.path.join(str(tmp_path), "missing"))
+
+
+def test_writers_in_other_processes_wait_for_the_manifest_lock(tmp_path):
+    manifest = Manifest(str(tmp_path))
+    manifest.update("1", "de")
+    script = "import sys; from manifest import Manifest; Manifest(sys.argv[1]).update('2', 'de')"
+    with manifest.lock_manifest("de"):
+        writer = subprocess.Popen([sys.executable, "-c", script, str(tmp_path)],
+                                  cwd=os.path.dirname(os.path.abspath(__file__)))
+        time.sleep(1)
+        assert writer.poll() is None  # the writer is blocked while the manifest is locked
+        assert list(manifest.read_records("de")) == ["1"]
+    assert writer.wait(timeout=30) == 0
+    assert sorted(manifest.load("de")) == ["1", "2"]
@@ -0,0 +1,85 @@
+from video_predictor import VideoPredictor, VideoRule
+import random
+
+
+class FakeDB:
+    def __init__(self, skipped_articles: list = None):
+        self.statistics = {}
+        self.skipped_articles = skipped_articles if skipped_articles is not None else []
+        self.requeued = []
+
+    def load_video_statistics(self) -> dict:
+        return {}
+
+    def store_video_statistics(self, language: str, signature: str, pages: int, pages_with_video: int):
+        self.statistics[(language, signature)] = [pages, pages_with_video]
+
+    def get_skipped_articles(self) -> list:
+        return list(self.skipped_articles)
+
+    def requeue_skipped_article(self, article: dict, prediction: dict):
+        self.skipped_articles.remove(article)
+        self.requeued.append((article["id"], prediction))
+
+
+def test_rules_and_learned_statistics_are_blended():
+    rule = VideoRule("video_type", "media.type", values=["video"], likelihood=0.9)
+    predictor = VideoPredictor(FakeDB(), rules=[rule], default_likelihood=0.5, prior_weight=10)
+    prediction, crawl = predictor.predict("de", {"media": {"type": "video"}})
+    assert crawl
+    assert prediction["video_signature"] == "video_type"
+    assert abs(prediction["video_likelihood"] - 0.9) < 1e-9
+    for _ in range(10):
+        predictor.record_outcome("de", {"video_signature": "video_type"}, False)
+    assert abs(predictor.get_likelihood("de", "video_type") - 0.45) < 1e-9
+    assert abs(predictor.get_likelihood("fr", "video_type") - 0.9) < 1e-9
+    assert predictor.get_signature({"media": {"type": "text"}}) == "none"
+
+
+def test_skip_and_explore_decision():
+    random.seed(0)
+    predictor = VideoPredictor(FakeDB(), default_likelihood=0.01, skip_threshold=0.02, exploration_rate=0.5,
+                               hard_skip=True)
+    decisions = [predictor.predict("per", {}) for _ in range(200)]
+    explored = [prediction for prediction, crawl in decisions if crawl]
+    assert all(prediction["video_explored"] for prediction in explored)
+    assert 0 < len(explored) < 200
+    assert predictor.metrics["skipped"] + predictor.metrics["explored"] == 200
+    prediction, crawl = VideoPredictor(FakeDB(), default_likelihood=0.01).predict("per", {})
+    assert crawl and not prediction["video_explored"]
+
+
+def test_articles_below_the_threshold_are_deprioritized_by_default():
+    predictor = VideoPredictor(FakeDB(), default_likelihood=0.01, skip_threshold=0.02, exploration_rate=0.0)
+    prediction, crawl = predictor.predict("per", {})
+    assert crawl and prediction["video_deprioritized"]
+    assert predictor.metrics["skipped"] == 0
+    assert predictor.metrics["deprioritized"] == 1
+    predictor.record_outcome("per", prediction, True)
+    assert predictor.metrics["deprioritized_with_video"] == 1
+
+
+def test_outcomes_are_scored_against_the_stored_decision():
+    predictor = VideoPredictor(FakeDB(), default_likelihood=0.01, skip_threshold=0.02)
+    predictor.record_outcome("per", {"video_signature": "none", "video_explored": True}, True)
+    predictor.record_outcome("per", {"video_signature": "none", "video_explored": False}, False)
+    predictor.record_outcome("per", None, True)
+    assert predictor.metrics["explored_fetched"] == 1
+    assert predictor.metrics["explored_with_video"] == 1
+    assert predictor.metrics["crawled"] == 1
+    assert predictor.metrics["crawled_with_video"] == 0
+    assert predictor.metrics["fetched"] == 3
+    assert predictor.db.statistics[("per", "none")] == [2, 1]
+
+
+def test_skipped_articles_are_requeued_when_the_likelihood_rises():
+    skipped = {"id": "1", "language": "per", "video_signature": "none"}
+    db = FakeDB([skipped])
+    predictor = VideoPredictor(db, default_likelihood=0.01, prior_weight=10, skip_threshold=0.02, hard_skip=True)
+    predictor.requeue_skipped_articles()
+    assert db.requeued == []
+    predictor.record_outcome("per", {"video_signature": "none", "video_explored": True}, True)
+    predictor.requeue_skipped_articles()
+    assert len(db.requeued) == 1
+    assert db.requeued[0][1]["video_likelihood"] >= 0.02
+    assert predictor.metrics["requeued"] == 1
@@ -0,0 +1,195 @@
+from typing import Optional, Tuple
+from threading import Lock
+import logging
+import random
+
+
+class VideoRule:
+    def __init__(self, name: str, field: str, values: list = None, likelihood: float = 0.9):
+        """
+        A rule which matches the api metadata of an article if a field contains a hint for a video.
+        :param name: the name of the rule, used to group the learned statistics
+        :param field: the field in the metadata to check, nested fields are separated by a dot
+        :param values: the values of the field which indicate a video, if None any non empty value matches
+        :param likelihood: the assumed probability of a video if the rule matches and nothing was learned yet
+        """
+        self.name = name
+        self.field = field
+        self.values = values
+        self.likelihood = likelihood
+
+    def matches(self, meta: dict) -> bool:
+        value = meta
+        for key in self.field.split("."):
+            if not isinstance(value, dict) or key not in value:
+                return False
+            value = value[key]
+        if self.values is None:
+            return value is not None and value is not False and value != "" and value != [] and value != {}
+        return value in self.values
+
+
+class VideoPredictor:
+    """
+    Predicts whether an article contains a video from the metadata delivered by the api, so pages of likely text-only
+    articles can be deprioritized or skipped. The prediction starts with the likelihood of the configured rules and
+    learns from the outcome of every crawled page per language and matched rules. By default, articles below the
+    threshold are only crawled after all other articles. With hard skipping, they are not crawled at all and only
+    requeued as soon as the learned statistics raise their likelihood above the threshold again.
+    """
+    # no rules by default because no field of the timeline api is known to hint at a video, so the likelihood is only
+    # learned per language until rules are configured
+    default_rules = []
+
+    def __init__(self, database, rules: list = None, default_likelihood: float = 0.5, prior_weight: int = 10,
+                 skip_threshold: Optional[float] = None, exploration_rate: float = 0.05, hard_skip: bool = False):
+        """
+        :param database: the database to persist the learned statistics in
+        :param rules: the rules to classify the metadata, defaults to VideoPredictor.default_rules
+        :param default_likelihood: the assumed probability of a video if no rule matches and nothing was learned yet
+        :param prior_weight: the number of observations the likelihood of the rules is worth
+        :param skip_threshold: articles with a likelihood below this threshold are crawled last, None disables this
+        :param exploration_rate: the fraction of articles below the threshold crawled normally to measure misses
+        :param hard_skip: whether articles below the threshold are not crawled at all instead of being crawled last,
+        should only be enabled if rules for the metadata exist
+        """
+        self.db = database
+        self.rules = rules
+        if rules is None:
+            self.rules = self.default_rules
+        self.default_likelihood = default_likelihood
+        self.prior_weight = prior_weight
+        self.skip_threshold = skip_threshold
+        self.exploration_rate = exploration_rate
+        self.hard_skip = hard_skip
+        self.lock = Lock()
+        self.statistics = self.db.load_video_statistics()  # maps (language, signature) to [pages, pages with video]
+        self.statistics_changed = True  # whether skipped articles have to be checked again
+        self.metrics = {
+            "predicted": 0,  # articles classified by the predictor
+            "skipped": 0,  # pages not fetched because they were predicted as text-only
+            "deprioritized": 0,  # pages crawled last because they were predicted as text-only
+            "explored": 0,  # pages fetched although they were predicted as text-only
+            "requeued": 0,  # skipped pages which were queued again after the statistics changed
+            "fetched": 0,  # pages fetched and classified by the page crawler
+            "fetched_with_video": 0,  # fetched pages which contained a video
+            "crawled": 0,  # fetched pages which were predicted to be worth crawling
+            "crawled_with_video": 0,  # fetched pages predicted to be worth crawling which contained a video
+            "explored_fetched": 0,  # fetched pages which were crawled for exploration only
+            "explored_with_video": 0,  # fetched pages crawled for exploration which contained a video
+            "deprioritized_fetched": 0,  # fetched pages which were crawled last
+            "deprioritized_with_video": 0,  # fetched pages crawled last which contained a video
+        }
+
+    def get_signature(self, meta: dict) -> str:
+        matched = [rule.name for rule in self.rules if rule.matches(meta)]
+        return ",".join(matched) if len(matched) > 0 else "none"
+
+    def get_prior(self, signature: str) -> float:
+        likelihoods = [rule.likelihood for rule in self.rules if rule.name in signature.split(",")]
+        return max(likelihoods) if len(likelihoods) > 0 else self.default_likelihood
+
+    def predict(self, language: str, meta: dict) -> Tuple[dict, bool]:
+        """
+        Predicts the probability of a video in an article and decides whether its page should be crawled.
+        :param language: the language of the article
+        :param meta: the metadata of the article delivered by the api
+        :return: a tuple of (prediction, crawl), the prediction has to be stored with the article
+        """
+        signature = self.get_signature(meta)
+        with self.lock:
+            likelihood = self.get_likelihood(language, signature)
+            prediction = {"video_likelihood": likelihood, "video_signature": signature, "video_explored": False,
+                          "video_deprioritized": False}
+            self.metrics["predicted"] += 1
+            if not self.is_skippable(likelihood):
+                return prediction, True
+            if random.random() < self.exploration_rate:
+                self.metrics["explored"] += 1
+                prediction["video_explored"] = True
+                return prediction, True
+            if not self.hard_skip:
+                self.metrics["deprioritized"] += 1
+                prediction["video_deprioritized"] = True
+                return prediction, True
+            self.metrics["skipped"] += 1
+            return prediction, False
+
+    def is_skippable(self, likelihood: float) -> bool:
+        return self.skip_threshold is not None and likelihood < self.skip_threshold
+
+    def get_likelihood(self, language: str, signature: str) -> float:
+        pages, pages_with_video = self.statistics.get((language, signature), [0, 0])
+        prior = self.get_prior(signature)
+        return (pages_with_video + prior * self.prior_weight) / (pages + self.prior_weight)
+
+    def record_outcome(self, language: str, article: Optional[dict], has_video: bool):
+        """
+        Learns from the result of crawling the page of an article and scores the prediction made for it.
+        :param language: the language of the article
+        :param article: the article as stored in the database or None if it is not available
+        :param has_video: whether a video was found on the page
+        """
+        with self.lock:
+            self.metrics["fetched"] += 1
+            if has_video:
+                self.metrics["fetched_with_video"] += 1
+            if article is None or "video_signature" not in article:  # the article was stored without a prediction
+                return
+            if article.get("video_explored", False):
+                self.metrics["explored_fetched"] += 1
+                if has_video:
+                    self.metrics["explored_with_video"] += 1
+            elif article.get("video_deprioritized", False):
+                self.metrics["deprioritized_fetched"] += 1
+                if has_video:
+                    self.metrics["deprioritized_with_video"] += 1
+            else:
+                self.metrics["crawled"] += 1
+                if has_video:
+                    self.metrics["crawled_with_video"] += 1
+            signature = article["video_signature"]
+            counts = self.statistics.setdefault((language, signature), [0, 0])
+            counts[0] += 1
+            if has_video:
+                counts[1] += 1
+            pages, pages_with_video = counts
+            self.statistics_changed = True
+        self.db.store_video_statistics(language, signature, pages, pages_with_video)
+
+    def requeue_skipped_articles(self):
+        """
+        Queues skipped articles for crawling again if the learned statistics raised their likelihood above the
+        threshold, so no audio gets lost because of a prediction based on too few observations.
+        """
+        with self.lock:
+            if self.skip_threshold is None or not self.hard_skip or not self.statistics_changed:
+                return
+            self.statistics_changed = False
+        for article in self.db.get_skipped_articles():
+            with self.lock:
+                likelihood = self.get_likelihood(article["language"], article.get("video_signature", "none"))
+            if self.is_skippable(likelihood):
+                continue
+            prediction = {"video_likelihood": likelihood, "video_signature": article.get("video_signature", "none"),
+                          "video_explored": False, "video_deprioritized": False}
+            self.db.requeue_skipped_article(article, prediction)
+            with self.lock:
+                self.metrics["requeued"] += 1
+
+    def log_metrics(self):
+        with self.lock:
+            metrics = self.metrics.copy()
+        crawl_precision = metrics["crawled_with_video"] / metrics["crawled"] if metrics["crawled"] > 0 else 0
+        miss_rate = metrics["explored_with_video"] / metrics["explored_fetched"] \
+            if metrics["explored_fetched"] > 0 else 0
+        skipped = self.db.get_skipped_article_count()  # includes articles skipped before a restart
+        logging.info(f"Video prediction: {metrics['skipped']} of {metrics['predicted']} new articles skipped, "
+                     f"{skipped} page requests saved in total ({metrics['requeued']} skipped pages requeued), "
+                     f"{metrics['crawled_with_video']} of {metrics['crawled']} crawled pages had a video "
+                     f"({crawl_precision:.1%}), {metrics['explored_with_video']} of {metrics['explored_fetched']} "
+                     f"explored pages below the threshold had a video ({miss_rate:.1%}, "
+                     f"~{round(skipped * miss_rate)} videos estimated in skipped pages), "
+                     f"{metrics['deprioritized']} new articles deprioritized, "
+                     f"{metrics['deprioritized_with_video']} of {metrics['deprioritized_fetched']} "
+                     f"deprioritized pages had a video")